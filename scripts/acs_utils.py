@@ -0,0 +1,54 @@
+"""
+Shared Census ACS table helpers
+Used by data_integration.py (Step 3) and temporal_matching.py (Step 5)
+"""
+
+import pandas as pd
+import re
+
+# ACS estimate columns look like B15003_022E (margins of error end in M)
+ACS_ESTIMATE_RE = re.compile(r'^(B\d+_\d+)E$')
+
+def acs_estimates(columns):
+    """Map ACS variable codes to their estimate columns in one pass over the header"""
+    return {m.group(1): col for col in columns if (m := ACS_ESTIMATE_RE.match(col))}
+
+# B15003 variable codes used by pct_bachelors_plus: total population 25+, then
+# bachelor's, master's, professional and doctorate degrees
+BACHELORS_PLUS_CODES = ['B15003_001', 'B15003_022', 'B15003_023', 'B15003_024', 'B15003_025']
+
+def pct_bachelors_plus(edu):
+    """Percent of the population 25+ with a bachelor's degree or higher, per row of a B15003 table
+    
+    Returns None if the total or bachelor's estimate column is missing
+    """
+    estimates = acs_estimates(edu.columns)
+    total_col = estimates.get('B15003_001')
+    if not total_col or 'B15003_022' not in estimates:
+        return None
+    
+    total_25plus = pd.to_numeric(edu[total_col], errors='coerce')
+    # Convert the degree columns together and add across each row (NaN propagates)
+    degree_cols = [estimates[code] for code in BACHELORS_PLUS_CODES[1:] if code in estimates]
+    bachelors_plus = edu[degree_cols].apply(pd.to_numeric, errors='coerce').sum(axis=1, skipna=False)
+    return (bachelors_plus / total_25plus * 100).round(2)
+
+def read_acs(path, codes, state_fips='12'):
+    """Read a state's county rows from an ACS table: FIPS plus the estimate columns for the given variable codes
+    
+    Returns None if the table has no GEO_ID column
+    """
+    # Scan the header so only GEO_ID and the needed estimate columns are parsed
+    header = pd.read_csv(path, nrows=0).columns
+    if 'GEO_ID' not in header:
+        return None
+    usecols = ['GEO_ID'] + [col for col in header if col.endswith('E') and any(code in col for code in codes)]
+    
+    # The pyarrow engine parses in native threads, so concurrent reads overlap
+    df = pd.read_csv(path, engine='pyarrow', usecols=usecols)
+    
+    # County GEO_IDs look like 0500000US12001; the last five digits are the FIPS
+    df = df[df['GEO_ID'].str.startswith('0500000US' + state_fips, na=False)]
+    fips = df.pop('GEO_ID').str[-5:].astype('int32')
+    df.insert(0, 'FIPS', fips)
+    return df
@@ -3,8 +3,9 @@ Add USDA Rural-Urban Continuum Codes
 Integrates rural-urban classification with master dataset
 """
 
-import pandas as pd
 from pathlib import Path
+from pipeline_utils import map_by_fips, pause, read_processed
+from usda_utils import read_usda, add_rucc_labels, rucc_attribute, rucc_codes
 
 # Configuration
 current_dir = Path.cwd()
@@ -20,6 +21,10 @@ MASTER_FILE = BASE_DIR / "data" / "processed" / "Master_Dataset_Integrated.csv"
 USDA_FILE = BASE_DIR / "data" / "raw" / "usda" / "Ruralurbancontinuumcodes2023.csv"
 OUTPUT_DIR = BASE_DIR / "data" / "processed"
 
+def _is_usda_column(col):
+    """Columns process_usda_codes can use (long-format fields, or wide-format RUCC/county columns)"""
+    return col in ('FIPS', 'Attribute', 'Value') or 'RUCC' in col.upper() or 'county' in col.lower() or 'name' in col.lower()
+
 def load_data():
     """Load master dataset and USDA codes"""
     print("=" * 70)
@@ -27,21 +32,13 @@ def load_data():
     print("=" * 70)
     print("\n[1/4] Loading data...")
     
-    # Load master dataset
-    master = pd.read_csv(MASTER_FILE)
+    # Load master dataset (up-to-date Parquet copy from data_integration.py if present)
+    master = read_processed(MASTER_FILE).astype({'FIPS': 'Int32', 'Year': 'int16'})
     print(f"Loaded master dataset: {len(master)} rows, {len(master.columns)} columns")
     
-    # Load USDA codes
-    try:
-        usda = pd.read_csv(USDA_FILE, encoding='latin1')
-        print(f"Loaded USDA codes: {len(usda)} rows (encoding: latin1)")
-    except:
-        try:
-            usda = pd.read_csv(USDA_FILE, encoding='cp1252')
-            print(f"Loaded USDA codes: {len(usda)} rows (encoding: cp1252)")
-        except:
-            usda = pd.read_csv(USDA_FILE, encoding='iso-8859-1')
-            print(f"Loaded USDA codes: {len(usda)} rows (encoding: iso-8859-1)")
+    # Load USDA codes (latin1 maps every byte, so no other encoding is ever needed)
+    usda = read_usda(USDA_FILE, usecols=_is_usda_column, encoding='latin1')
+    print(f"Loaded USDA codes: {len(usda)} Florida rows (encoding: latin1)")
     
     print(f"  Columns: {list(usda.columns)}")
     
@@ -51,9 +48,8 @@ def process_usda_codes(usda):
     """Process USDA rural-urban codes for Florida"""
     print("\n[2/4] Processing USDA codes...")
     
-    # Filter for Florida (state FIPS = 12)
-    usda['State_FIPS'] = usda['FIPS'].astype(str).str[:2]
-    florida_usda = usda[usda['State_FIPS'] == '12'].copy()
+    # read_usda already kept only Florida rows (state FIPS = 12)
+    florida_usda = usda
     
     print(f"  Florida rows in USDA data: {len(florida_usda)}")
     
@@ -62,17 +58,13 @@ def process_usda_codes(usda):
         print(f"  Detected long format data")
         print(f"  Unique attributes: {florida_usda['Attribute'].unique()}")
         
-        # Filter for RUCC attribute
-        rucc_attributes = [attr for attr in florida_usda['Attribute'].unique() if 'RUCC' in str(attr)]
-        if rucc_attributes:
-            rucc_attr = rucc_attributes[0]
+        # Filter for RUCC attribute (same selection as usda_utils.load_rucc)
+        rucc_attr = rucc_attribute(florida_usda)
+        if rucc_attr is not None:
             print(f"  Using attribute: {rucc_attr}")
             
-            # Filter and pivot
-            florida_rucc = florida_usda[florida_usda['Attribute'] == rucc_attr].copy()
-            florida_rucc = florida_rucc[['FIPS', 'County_Name', 'Value']].copy()
-            florida_rucc.columns = ['FIPS', 'USDA_County_Name', 'Rural_Urban_Code']
-            florida_rucc['Rural_Urban_Code'] = pd.to_numeric(florida_rucc['Rural_Urban_Code'], errors='coerce')
+            florida_rucc = rucc_codes(florida_usda[['FIPS', 'County_Name', 'Attribute', 'Value']], rucc_attr)
+            florida_rucc = florida_rucc.rename(columns={'County_Name': 'USDA_County_Name'})
         else:
             print(f"  No RUCC attribute found in: {florida_usda['Attribute'].unique()}")
             return None
@@ -89,38 +81,14 @@ def process_usda_codes(usda):
         county_cols = [col for col in florida_usda.columns if 'county' in col.lower() or 'name' in col.lower()]
         county_col = county_cols[0] if county_cols else 'County_Name'
         
-        florida_rucc = florida_usda[['FIPS', rucc_col, county_col]].copy()
-        florida_rucc.columns = ['FIPS', 'Rural_Urban_Code', 'USDA_County_Name']
+        florida_rucc = florida_usda[['FIPS', rucc_col, county_col]].rename(
+            columns={rucc_col: 'Rural_Urban_Code', county_col: 'USDA_County_Name'}
+        )
     
     print(f"  Florida counties with RUCC codes: {len(florida_rucc)}")
     
-    # Add categorical descriptions
-    rucc_descriptions = {
-        1: 'Metro - Large (1M+ pop)',
-        2: 'Metro - Medium (250K-1M pop)',
-        3: 'Metro - Small (<250K pop)',
-        4: 'Nonmetro - Urban (20K+, adjacent to metro)',
-        5: 'Nonmetro - Urban (20K+, not adjacent)',
-        6: 'Nonmetro - Urban (2.5-20K, adjacent to metro)',
-        7: 'Nonmetro - Urban (2.5-20K, not adjacent)',
-        8: 'Nonmetro - Rural (<2.5K, adjacent to metro)',
-        9: 'Nonmetro - Rural (<2.5K, not adjacent)'
-    }
-    
-    florida_rucc['Rural_Urban_Description'] = florida_rucc['Rural_Urban_Code'].map(rucc_descriptions)
-    
-    # Create simplified categories
-    def categorize(code):
-        if pd.isna(code):
-            return None
-        if code in [1, 2, 3]:
-            return 'Metropolitan'
-        elif code in [4, 5, 6, 7]:
-            return 'Micropolitan/Small Urban'
-        else:  # 8, 9
-            return 'Rural'
-    
-    florida_rucc['Urban_Rural_Category'] = florida_rucc['Rural_Urban_Code'].apply(categorize)
+    # Add descriptions and simplified categories
+    florida_rucc = add_rucc_labels(florida_rucc)
     
     print("  Rural-Urban Distribution:")
     for category, count in florida_rucc['Urban_Rural_Category'].value_counts().items():
@@ -132,8 +100,8 @@ def integrate_usda(master, usda_codes):
     """Integrate USDA codes with master dataset"""
     print("\n[3/4] Integrating USDA codes with master dataset...")
     
-    # Merge on FIPS
-    integrated = master.merge(usda_codes, on='FIPS', how='left')
+    # Look up the USDA columns by FIPS
+    integrated = map_by_fips(master, usda_codes)
     
     # Check for unmatched
     unmatched = integrated[integrated['Rural_Urban_Code'].isna()]
@@ -156,23 +124,33 @@ def analyze_rural_urban_patterns(df):
     
     # Focus on 2024 data
     df_2024 = df[df['Year'] == 2024].copy()
+    df_2024['Urban_Rural_Category'] = df_2024['Urban_Rural_Category'].astype('category')
     
     print("\n  2024 Average Turnout by Urban-Rural Category:")
-    turnout_by_category = df_2024.groupby('Urban_Rural_Category')['Turnout_Percent'].agg(['mean', 'std', 'count'])
+    turnout_by_category = df_2024.groupby('Urban_Rural_Category', observed=True)['Turnout_Percent'].agg(['mean', 'std', 'count'])
     turnout_by_category.columns = ['Avg_Turnout', 'Std_Dev', 'N_Counties']
     turnout_by_category['Avg_Turnout'] = turnout_by_category['Avg_Turnout'].round(2)
     turnout_by_category['Std_Dev'] = turnout_by_category['Std_Dev'].round(2)
     print(turnout_by_category.to_string())
     
     print("\n  Top 5 Counties by Category (2024):")
-    for category in df_2024['Urban_Rural_Category'].unique():
-        if pd.notna(category):
-            print(f"\n  {category}:")
-            top5 = df_2024[df_2024['Urban_Rural_Category'] == category].nlargest(5, 'Turnout_Percent')[
-                ['County', 'Turnout_Percent', 'Total_Population']
-            ]
-            for _, row in top5.iterrows():
-                print(f"    {row['County']}: {row['Turnout_Percent']:.1f}% (pop: {row['Total_Population']:,.0f})")
+    # One stable sort, then the first five rows of each category (ties keep row order, as nlargest did)
+    top5_all = (
+        df_2024.sort_values('Turnout_Percent', ascending=False, kind='stable')
+        .groupby('Urban_Rural_Category', observed=True)
+        .head(5)[['Urban_Rural_Category', 'County', 'Turnout_Percent', 'Total_Population']]
+    )
+    top5_by_category = dict(list(top5_all.groupby('Urban_Rural_Category', observed=True)))
+    
+    # Report categories in the order they appear in the data, as one block
+    lines = []
+    for category in df_2024['Urban_Rural_Category'].dropna().unique():
+        lines.append(f"\n  {category}:")
+        lines.extend(
+            f"    {row.County}: {row.Turnout_Percent:.1f}% (pop: {row.Total_Population:,.0f})"
+            for row in top5_by_category[category].itertuples(index=False)
+        )
+    print("\n".join(lines))
 
 def save_data(df):
     """Save updated dataset"""
@@ -183,6 +161,7 @@ def save_data(df):
     # Save complete dataset
     output_file = OUTPUT_DIR / "Master_Dataset_with_USDA.csv"
     df.to_csv(output_file, index=False)
+    df.to_parquet(output_file.with_suffix('.parquet'), compression='snappy', index=False)
     print(f"  Saved: {output_file}")
     
     # Save 2024 subset
@@ -227,7 +206,7 @@ def main():
         import traceback
         traceback.print_exc()
     finally:
-        input("\nPress Enter to exit...")
+        pause()
 
 if __name__ == "__main__":
     main()
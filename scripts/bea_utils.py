@@ -0,0 +1,44 @@
+"""
+Shared BEA county table helpers
+Used by data_integration.py (Step 3) and temporal_matching.py (Step 5)
+"""
+
+import pandas as pd
+
+def latest_bea_year(path):
+    """Most recent year column in a BEA table, read from the header row only"""
+    with open(path, encoding='latin1') as f:
+        header = f.readline().rstrip('\r\n').split(',')
+    return max(col for col in header if col.isdigit())
+
+def _clean_geofips(value):
+    """Remove quotes and spaces around a GeoFIPS code"""
+    return value.strip(' "\t\r\n')
+
+def load_bea(path, line_pattern, years, state_fips='12'):
+    """Load one BEA line for a state's counties, indexed by FIPS with the requested year columns
+    
+    line_pattern is a string or compiled regex searched for in Description; years missing
+    from the file are left out, and non-numeric cells such as (D) become NaN
+    """
+    # Only parse the identifier columns and years that are present in the file;
+    # GeoFIPS is cleaned while parsing
+    header = pd.read_csv(path, encoding='latin1', nrows=0).columns
+    year_cols = [year for year in years if year in header]
+    bea = pd.read_csv(path, encoding='latin1', usecols=['GeoFIPS', 'Description'] + year_cols,
+                      converters={'GeoFIPS': _clean_geofips})
+    
+    # Counties are SS001-SS999 (SS000 is the state total); the footnote lines at the
+    # end of BEA files have non-numeric GeoFIPS values, which fail the range check
+    fips = pd.to_numeric(bea['GeoFIPS'], errors='coerce')
+    state_total = int(state_fips) * 1000
+    in_state = (fips > state_total) & (fips <= state_total + 999)
+    bea = bea[in_state].assign(FIPS=fips[in_state].astype('int32'))
+    
+    # Filter for the requested line; each Description repeats for every county,
+    # so match against the distinct lines only
+    descriptions = bea['Description'].astype('category')
+    lines = descriptions.cat.categories
+    bea = bea[descriptions.isin(lines[lines.str.contains(line_pattern)])]
+    
+    return bea.set_index('FIPS')[year_cols].apply(pd.to_numeric, errors='coerce')
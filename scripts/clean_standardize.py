@@ -5,6 +5,10 @@ Cleans election data, adds FIPS codes, and performs quality checks
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import io
+import sys
+from functools import partial
+from pipeline_utils import read_processed
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -22,6 +26,15 @@ FIPS_FILE = BASE_DIR / "data" / "raw" / "reference" / "florida_fips_codes.csv"
 OUTPUT_DIR = BASE_DIR / "data" / "processed"
 DOCS_DIR = BASE_DIR / "documentation"
 
+# Column types for the combined election file (skips type inference on read)
+ELECTION_DTYPES = {
+    'County': 'string',
+    'Year': 'int16',
+    'Registered_Voters': 'Int32',  # nullable, so a blank count is reported by quality_checks
+    'Votes_Cast': 'Int32',
+    'Turnout_Percent': 'float64'
+}
+
 # Load election data and FIPS reference
 def load_data():
     # Load election data
@@ -29,7 +42,8 @@ def load_data():
         print(f"Election file not found: {ELECTION_FILE}")
         return None, None
     
-    elections = pd.read_csv(ELECTION_FILE)
+    # Prefer an up-to-date Parquet copy written by combine_elections_script.py
+    elections = read_processed(ELECTION_FILE, dtype=ELECTION_DTYPES).astype(ELECTION_DTYPES)
     
     # Load FIPS reference
     if not FIPS_FILE.exists():
@@ -42,8 +56,6 @@ def load_data():
 
 # Standardize county name variations
 def standardize_county_names(df):
-    df = df.copy()
-    
     # Variations to standardize
     name_fixes = {
         'St. Johns': 'St. Johns',
@@ -59,21 +71,26 @@ def standardize_county_names(df):
         'De Soto': 'Desoto'
     }
     
-    # standardization
-    df['County_Original'] = df['County']
-    df['County'] = df['County'].str.strip()
-    
-    # Apply name fixes
-    df['County'] = df['County'].replace(name_fixes)
+    # standardization - strip and apply name fixes on the unique names only,
+    # then map back to every row through the factorized codes. Missing names are
+    # NaN in object arrays, so the comparisons below are NA-safe and count a blank
+    # name as a change (NaN != NaN)
+    county = df['County'].to_numpy(dtype=object, na_value=np.nan)
+    df['County_Original'] = county
+    codes, names = pd.factorize(county, use_na_sentinel=False)
+    fixed = pd.Series(names, dtype=object).str.strip().replace(name_fixes)
+    fixed = fixed.to_numpy(dtype=object, na_value=np.nan)
+    df['County'] = fixed[codes]
     
     # Count changes
-    changes = (df['County'] != df['County_Original']).sum()
+    changes = (df['County'].to_numpy() != df['County_Original'].to_numpy()).sum()
     if changes > 0:
         print(f"\tStandardized {changes} county names")
         print(f"\tChanges made:")
-        changed = df[df['County'] != df['County_Original']][['County_Original', 'County']].drop_duplicates()
-        for _, row in changed.iterrows():
-            print(f"\t\t{row['County_Original']} -> {row['County']}")
+        print("\n".join(
+            f"\t\t{orig} -> {new}"
+            for orig, new in zip(names, fixed) if orig != new
+        ))
     
     return df
 
@@ -84,144 +101,189 @@ def add_fips_codes(elections_df, fips_df):
         print("\tCannot add FIPS codes")
         return elections_df
     
-    # Merge on county name
-    merged = elections_df.merge(
-        fips_df[['FIPS', 'County_Name']], 
-        left_on='County', 
-        right_on='County_Name',
-        how='left'
-    )
+    # Categorical County so later groupbys hash integer codes instead of strings
+    elections_df['County'] = elections_df['County'].astype('category')
+    
+    # Look up FIPS by county name (small reference table, so a dict map
+    # replaces a merge)
+    lookup = dict(zip(fips_df['County_Name'].to_numpy(), fips_df['FIPS'].to_numpy()))
+    elections_df['FIPS'] = elections_df['County'].map(lookup).astype('Int32')
     
     # Check for unmatched counties
-    unmatched = merged[merged['FIPS'].isna()]['County'].unique()
+    unmatched = elections_df[elections_df['FIPS'].isna()]['County'].unique()
     
     if len(unmatched) > 0:
-        print(f"\Notice: {len(unmatched)} counties not matched:")
+        print(f"\tNotice: {len(unmatched)} counties not matched:")
         for county in unmatched:
             print(f"\t- {county}")
-        print(f"  Total unmatched records: {merged['FIPS'].isna().sum()}")
-    
-    # Clean up
-    merged = merged.drop('County_Name', axis=1)
+        print(f"  Total unmatched records: {elections_df['FIPS'].isna().sum()}")
     
     # Reorder columns
     cols = ['FIPS', 'County', 'Year', 'Election_Date', 'Registered_Voters', 
             'Votes_Cast', 'Turnout_Percent']
-    if 'County_Original' in merged.columns:
+    if 'County_Original' in elections_df.columns:
         cols.insert(2, 'County_Original')
     
-    merged = merged[cols]
-    
-    return merged
+    return elections_df[cols]
 
 # Perform data quality checks
 def quality_checks(df):
+    # Report is buffered and written to stdout in one call
+    buf = io.StringIO()
+    write = partial(print, file=buf)
+    
     issues = []
     
     # Check: Missing values
     missing = df.isnull().sum()
     if missing.any():
-        print("  Checking for missing values:")
+        write("  Checking for missing values:")
         for col, count in missing[missing > 0].items():
-            print(f"\t- {col}: {count} missing values")
+            write(f"\t- {col}: {count} missing values")
             issues.append(f"Missing values in {col}: {count}")
     
     # Check: Expected number of counties per year
-    print("\n  Checking county counts per year:")
-    counts = df.groupby('Year')['County'].nunique()
+    write("\n  Checking county counts per year:")
+    # Rows per County-Year; reused for the duplicate check below
+    group_sizes = df.groupby(['Year', 'County'], sort=False, observed=True).size()
+    counts = group_sizes.groupby(level='Year').size()
     for year, count in counts.items():
         status = "Pass" if count == 67 else "Fail"
-        print(f"    {status} {year}: {count} counties (expected 67)")
+        write(f"    {status} {year}: {count} counties (expected 67)")
         if count != 67:
             issues.append(f"Year {year} has {count} counties instead of 67")
     
     # Check: Turnout percentages in range
-    print("\n  Checking turnout percentages:")
+    write("\n  Checking turnout percentages:")
     low_turnout = df[df['Turnout_Percent'] < 30]
     high_turnout = df[df['Turnout_Percent'] > 95]
     
     if len(low_turnout) > 0:
-        print(f"\t- {len(low_turnout)} records with turnout < 30%:")
-        for _, row in low_turnout.iterrows():
-            print(f"      {row['County']} {row['Year']}: {row['Turnout_Percent']:.1f}%")
-            issues.append(f"Low turnout: {row['County']} {row['Year']} = {row['Turnout_Percent']:.1f}%")
+        write(f"\t- {len(low_turnout)} records with turnout < 30%:")
+        low_rows = list(zip(
+            low_turnout['County'].to_numpy(),
+            low_turnout['Year'].to_numpy(),
+            low_turnout['Turnout_Percent'].to_numpy()
+        ))
+        write("\n".join(f"      {c} {y}: {t:.1f}%" for c, y, t in low_rows))
+        issues.extend(f"Low turnout: {c} {y} = {t:.1f}%" for c, y, t in low_rows)
     
     if len(high_turnout) > 0:
-        print(f"\t- {len(high_turnout)} records with turnout > 95%:")
-        for _, row in high_turnout.iterrows():
-            print(f"\t\t{row['County']} {row['Year']}: {row['Turnout_Percent']:.1f}%")
+        write(f"\t- {len(high_turnout)} records with turnout > 95%:")
+        write("\n".join(
+            f"\t\t{c} {y}: {t:.1f}%"
+            for c, y, t in zip(
+                high_turnout['County'].to_numpy(),
+                high_turnout['Year'].to_numpy(),
+                high_turnout['Turnout_Percent'].to_numpy()
+            )
+        ))
     
     # Check: Verify turnout calculation
-    print("\n  Verifying turnout calculations:")
-    df['Calculated_Turnout'] = (df['Votes_Cast'] / df['Registered_Voters'] * 100).round(1)
-    df['Turnout_Difference'] = (df['Calculated_Turnout'] - df['Turnout_Percent']).abs()
-    
-    mismatches = df[df['Turnout_Difference'] > 0.5]  # Allow 0.5% difference for rounding
+    write("\n  Verifying turnout calculations:")
+    # Computed on NumPy arrays so no temporary columns are added to df
+    reported = df['Turnout_Percent'].to_numpy(dtype=float, na_value=np.nan)
+    calculated = np.round(
+        df['Votes_Cast'].to_numpy(dtype=float, na_value=np.nan)
+        / df['Registered_Voters'].to_numpy(dtype=float, na_value=np.nan) * 100, 1
+    )
+    mismatches = np.flatnonzero(np.abs(calculated - reported) > 0.5)  # Allow 0.5% difference for rounding
     if len(mismatches) > 0:
-        print(f"\t- {len(mismatches)} records with turnout calculation mismatches:")
-        for _, row in mismatches.head(5).iterrows():
-            print(f"\t\t{row['County']} {row['Year']}: Reported={row['Turnout_Percent']:.1f}%, Calculated={row['Calculated_Turnout']:.1f}%")
-    
-    # Clean up temporary columns
-    df = df.drop(['Calculated_Turnout', 'Turnout_Difference'], axis=1)
+        write(f"\t- {len(mismatches)} records with turnout calculation mismatches:")
+        top = mismatches[:5]
+        write("\n".join(
+            f"\t\t{c} {y}: Reported={t:.1f}%, Calculated={calc:.1f}%"
+            for c, y, t, calc in zip(
+                df['County'].to_numpy()[top],
+                df['Year'].to_numpy()[top],
+                reported[top],
+                calculated[top]
+            )
+        ))
     
     # Check: Duplicate records
-    print("\n  Checking for duplicates:")
-    duplicates = df.duplicated(subset=['County', 'Year'], keep=False)
-    if duplicates.any():
-        dup_count = duplicates.sum()
-        print(f"\t\t- Found {dup_count} duplicate County-Year combinations:")
-        dup_df = df[duplicates][['County', 'Year', 'Votes_Cast']].sort_values(['County', 'Year'])
-        print(dup_df.head(10))
+    write("\n  Checking for duplicates:")
+    duplicates = group_sizes[group_sizes > 1]
+    if len(duplicates) > 0:
+        dup_count = int(duplicates.sum())
+        write(f"\t\t- Found {dup_count} duplicate County-Year combinations:")
+        # Index lookup on the (categorical) keys instead of a merge
+        dup_keys = duplicates.reorder_levels(['County', 'Year']).sort_index().index
+        dup_df = df.set_index(['County', 'Year']).loc[dup_keys, ['Votes_Cast']].reset_index()
+        write(dup_df.head(10))
         issues.append(f"Duplicate records: {dup_count}")
     
     # Summary
-    print(f"\n  {'='*66}")
+    write(f"\n  {'='*66}")
     if len(issues) == 0:
-        print("ALL QUALITY CHECKS PASSED")
+        write("ALL QUALITY CHECKS PASSED")
     else:
-        print(f"\t- Found {len(issues)} issues")
-    print(f"  {'='*66}")
+        write(f"\t- Found {len(issues)} issues")
+    write(f"  {'='*66}")
+    
+    sys.stdout.write(buf.getvalue())
     
     return df, issues
 
 # Create summary statistics
 def create_summary_statistics(df):
+    # Report is buffered and written to stdout in one call
+    buf = io.StringIO()
+    write = partial(print, file=buf)
+    
     # Overall statistics
-    print("\n  Dataset Overview:")
-    print(f"\tTotal records: {len(df)}")
-    print(f"\tYears covered: {df['Year'].min()} - {df['Year'].max()}")
-    print(f"\tCounties: {df['County'].nunique()}")
-    print(f"\tTotal votes (all years): {df['Votes_Cast'].sum():,.0f}")
-    print(f"\tTotal registered (all years): {df['Registered_Voters'].sum():,.0f}")
+    write("\n  Dataset Overview:")
+    write(f"\tTotal records: {len(df)}")
+    write(f"\tYears covered: {df['Year'].min()} - {df['Year'].max()}")
+    write(f"\tCounties: {df['County'].nunique()}")
+    write(f"\tTotal votes (all years): {df['Votes_Cast'].sum():,.0f}")
+    write(f"\tTotal registered (all years): {df['Registered_Voters'].sum():,.0f}")
     
     # Statistics by year
-    print("\n  Turnout Statistics by Year:")
+    # Median and county count are not shown here; they feed the saved summary
+    write("\n  Turnout Statistics by Year:")
     year_stats = df.groupby('Year').agg({
-        'Turnout_Percent': ['mean', 'std', 'min', 'max'],
+        'Turnout_Percent': ['mean', 'median', 'std', 'min', 'max'],
         'Votes_Cast': 'sum',
-        'Registered_Voters': 'sum'
+        'Registered_Voters': 'sum',
+        'County': 'count'
     }).round(2)
-    year_stats.columns = ['Avg_Turnout', 'Std_Dev', 'Min_Turnout', 'Max_Turnout', 
-                          'Total_Votes', 'Total_Registered']
-    print(year_stats.to_string())
+    year_stats.columns = ['Avg_Turnout', 'Median_Turnout', 'Std_Dev', 'Min_Turnout', 'Max_Turnout', 
+                          'Total_Votes', 'Total_Registered', 'Counties']
+    write(year_stats[['Avg_Turnout', 'Std_Dev', 'Min_Turnout', 'Max_Turnout', 
+                      'Total_Votes', 'Total_Registered']].to_string())
     
     # Top and bottom turnout counties (2024)
-    if 2024 in df['Year'].values:
-        print("\n  2024 Election - Highest Turnout Counties:")
-        top_2024 = df[df['Year'] == 2024].nlargest(5, 'Turnout_Percent')[
-            ['County', 'Turnout_Percent', 'Votes_Cast', 'Registered_Voters']
-        ]
-        print(top_2024.to_string(index=False))
+    df_2024 = df[df['Year'].to_numpy() == 2024]
+    if len(df_2024) > 0:
+        cols = ['County', 'Turnout_Percent', 'Votes_Cast', 'Registered_Voters']
         
-        print("\n  2024 Election - Lowest Turnout Counties:")
-        bottom_2024 = df[df['Year'] == 2024].nsmallest(5, 'Turnout_Percent')[
-            ['County', 'Turnout_Percent', 'Votes_Cast', 'Registered_Voters']
-        ]
-        print(bottom_2024.to_string(index=False))
+        write("\n  2024 Election - Highest Turnout Counties:")
+        top_2024 = df_2024.nlargest(5, 'Turnout_Percent')[cols]
+        write(top_2024.to_string(index=False))
+        
+        write("\n  2024 Election - Lowest Turnout Counties:")
+        bottom_2024 = df_2024.nsmallest(5, 'Turnout_Percent')[cols]
+        write(bottom_2024.to_string(index=False))
+    
+    sys.stdout.write(buf.getvalue())
     
     return year_stats
 
+# Label pandas gives a text column read from CSV ('object' on pandas 2, 'str' on pandas 3)
+TEXT_TYPE = str(pd.Series(['']).dtype)
+
+# Published type for a column: the logical type, independent of the narrower
+# in-memory dtype (Int32, int16, category, ...) used inside the pipeline
+def _logical_type(series):
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int64'
+    if pd.api.types.is_float_dtype(series):
+        return 'float64'
+    return TEXT_TYPE
+
 # Create data dictionary documentation
 def create_data_dictionary(df):
     DOCS_DIR.mkdir(parents=True, exist_ok=True)
@@ -276,7 +338,7 @@ def create_data_dictionary(df):
         if col in column_metadata:
             records.append({
                 'Variable_Name': col,
-                'Data_Type': str(df[col].dtype),
+                'Data_Type': _logical_type(df[col]),
                 'Description': column_metadata[col]['description'],
                 'Source': column_metadata[col]['source'],
                 'Notes': column_metadata[col]['notes']
@@ -284,7 +346,7 @@ def create_data_dictionary(df):
         else:
             records.append({
                 'Variable_Name': col,
-                'Data_Type': str(df[col].dtype),
+                'Data_Type': _logical_type(df[col]),
                 'Description': 'Additional variable',
                 'Source': 'Derived',
                 'Notes': ''
@@ -295,7 +357,7 @@ def create_data_dictionary(df):
     # Add value ranges
     ranges = []
     for col in df.columns:
-        if df[col].dtype in ['int64', 'float64']:
+        if pd.api.types.is_numeric_dtype(df[col]):
             ranges.append(f"{df[col].min():,.0f} to {df[col].max():,.0f}")
         else:
             unique_count = df[col].nunique()
@@ -314,26 +376,23 @@ def create_data_dictionary(df):
     return dictionary
 
 # Save cleaned and standardized data
-def save_cleaned_data(df):
+def save_cleaned_data(df, year_stats):
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
     # Save main cleaned file
     output_file = OUTPUT_DIR / "Elections_Cleaned_with_FIPS.csv"
     df.to_csv(output_file, index=False)
     print(f"\tSaved cleaned data: {output_file}")
+    
+    # Typed Parquet copy for the next pipeline step
+    df.to_parquet(output_file.with_suffix('.parquet'), compression='snappy', index=False)
     print(f"\tRows: {len(df)}")
     print(f"\tColumns: {len(df.columns)}")
     
-    # Save summary by year
+    # Save summary by year (reuses the statistics from create_summary_statistics)
     summary_file = OUTPUT_DIR / "Turnout_Summary_by_Year.csv"
-    summary = df.groupby('Year').agg({
-        'County': 'count',
-        'Registered_Voters': 'sum',
-        'Votes_Cast': 'sum',
-        'Turnout_Percent': ['mean', 'median', 'std', 'min', 'max']
-    }).round(2)
-    summary.columns = ['Counties', 'Total_Registered', 'Total_Votes', 
-                       'Avg_Turnout', 'Median_Turnout', 'Std_Dev', 'Min_Turnout', 'Max_Turnout']
+    summary = year_stats[['Counties', 'Total_Registered', 'Total_Votes', 
+                          'Avg_Turnout', 'Median_Turnout', 'Std_Dev', 'Min_Turnout', 'Max_Turnout']]
     summary.to_csv(summary_file)
     
     return output_file
@@ -361,7 +420,7 @@ def main():
         data_dict = create_data_dictionary(elections)
         
         # Save results
-        output_file = save_cleaned_data(elections)
+        output_file = save_cleaned_data(elections, summary_stats)
         
     except Exception as e:
         print(f"\nError: {e}")
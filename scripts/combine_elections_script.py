@@ -5,6 +5,8 @@ Combine all election year CSV files into one master dataset
 import pandas as pd
 from pathlib import Path
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from pipeline_utils import is_interactive, pause
 
 # Combine all election year files into one master dataset
 def combine_election_data():
@@ -22,22 +24,26 @@ def combine_election_data():
     
     # Check if input directory exists
     if not INPUT_DIR.exists():
-        input("\nWrong IO Directory...")
+        if is_interactive():
+            input("\nWrong IO Directory...")
+        else:
+            print("\nWrong IO Directory...")
         return
     
     # Files to combine
     years = [2016, 2018, 2020, 2022, 2024]
     dataframes = []
     
-    for year in years:
-        file_path = INPUT_DIR / f"Voter_Turnout_{year}.csv"
-        
-        if file_path.exists():
-            try:
-                df = pd.read_csv(file_path)
-                dataframes.append(df)
-            except Exception as e:
-                print(f"\tError reading file: {e}")
+    # Read the yearly files concurrently; read errors surface from result() below
+    file_paths = [INPUT_DIR / f"Voter_Turnout_{year}.csv" for year in years]
+    with ThreadPoolExecutor(max_workers=len(years)) as executor:
+        reads = [executor.submit(pd.read_csv, path) for path in file_paths if path.exists()]
+    
+    for read in reads:
+        try:
+            dataframes.append(read.result())
+        except Exception as e:
+            print(f"\tError reading file: {e}")
     
     if not dataframes:
         print("\nData files were successfully loaded")
@@ -47,6 +53,10 @@ def combine_election_data():
     try:
         combined = pd.concat(dataframes, ignore_index=True)
         
+        # 67 county names repeated every year - store as category codes
+        combined['County'] = combined['County'].astype('category')
+        combined['Year'] = combined['Year'].astype('int16')
+        
         if len(combined) == len(years) * 67:
             print("Record count matches expected")
         else:
@@ -85,6 +95,9 @@ def combine_election_data():
     try:
         combined.to_csv(output_file, index=False)
         
+        # Typed Parquet copy for clean_standardize.py
+        combined.to_parquet(output_file.with_suffix('.parquet'), compression='snappy', index=False)
+        
         # Show preview
         print("\nPreview:")
         print(combined.head(10).to_string())
@@ -102,4 +115,4 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
     finally:
-        input("\nPress Enter to exit...")
\ No newline at end of file
+        pause()
\ No newline at end of file
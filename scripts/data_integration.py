@@ -5,7 +5,12 @@ Processes Census and BEA data and integrates with election data
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import re
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from acs_utils import BACHELORS_PLUS_CODES, acs_estimates, pct_bachelors_plus, read_acs
+from bea_utils import latest_bea_year, load_bea
+from pipeline_utils import pause, read_processed
 warnings.filterwarnings('ignore')
 
 # Configuration
@@ -21,6 +26,50 @@ CENSUS_DIR = BASE_DIR / "data" / "raw" / "census" / "acs_2020"
 BEA_DIR = BASE_DIR / "data" / "raw" / "bea"
 OUTPUT_DIR = BASE_DIR / "data" / "processed"
 
+# Column types for the cleaned election CSV (skips type inference on read)
+ELECTION_DTYPES = {
+    'FIPS': 'Int32',  # nullable, as written by add_fips_codes (unmatched counties are NA)
+    'County': 'string',
+    'County_Original': 'string',
+    'Year': 'int16',
+    'Registered_Voters': 'Int32',  # nullable, so a blank count is reported by quality_checks
+    'Votes_Cast': 'Int32',
+    'Turnout_Percent': 'float64'
+}
+
+# ACS tables read by process_census_data, with the variable codes used from each
+ACS_FILES = {
+    'income': ("median_household_income_2020.csv", ['B19013']),
+    'population': ("total_population_2020.csv", ['B01003']),
+    'education': ("educational_attainment_2020.csv", BACHELORS_PLUS_CODES),
+    'age': ("sex_by_age_2020.csv", ['B01002_001'])
+}
+
+# BEA tables read by process_bea_data: (file, Description line, output column)
+BEA_TABLES = {
+    'income': (BEA_DIR / "personal_income" / "CAINC1_FL_1969_2023.csv",
+               re.compile('Per capita personal income', re.IGNORECASE), 'Per_Capita_Income'),
+    'gdp': (BEA_DIR / "gdp" / "CAGDP2_FL_2001_2023.csv",
+            re.compile('All industry total', re.IGNORECASE), 'GDP_Millions'),
+    # CAINC4 has "Total employment" in the description
+    'employment': (BEA_DIR / "employment" / "CAINC4_FL_1969_2023.csv",
+                   re.compile('Total employment', re.IGNORECASE), 'Total_Employment')
+}
+
+# Load one BEA line for Florida counties from the most recent year available
+def _load_latest_bea(path, line_pattern, out_col):
+    latest_year = latest_bea_year(path)
+    df = load_bea(path, line_pattern, [latest_year])
+    return df.rename(columns={latest_year: out_col}).reset_index(), latest_year
+
+# Outer-join per-county frames on FIPS in a single index alignment
+def _combine_on_fips(frames):
+    indexed = [df.set_index('FIPS') for df in frames]
+    for df in indexed:
+        if not df.index.is_unique:
+            raise ValueError(f"Duplicate FIPS codes in {', '.join(df.columns)}")
+    return pd.concat(indexed, axis=1, join='outer').reset_index()
+
 # Load cleaned election data
 def load_election_data():
     print("=" * 70)
@@ -28,7 +77,9 @@ def load_election_data():
     print("=" * 70)
     print("\n[1/6] Loading election data...")
     
-    elections = pd.read_csv(ELECTION_FILE)
+    # Prefer an up-to-date typed Parquet copy written by clean_standardize.py
+    elections = read_processed(ELECTION_FILE, dtype=ELECTION_DTYPES)
+    elections['FIPS'] = elections['FIPS'].astype('Int32')
     print(f"  Loaded election data: {len(elections)} rows")
     print(f"  Years: {sorted(elections['Year'].unique())}")
     print(f"  Counties: {elections['County'].nunique()}")
@@ -39,15 +90,17 @@ def load_election_data():
 def process_census_data():
     census_dfs = {}
     
+    # Read all tables concurrently (one worker per table); read errors surface from result() below
+    with ThreadPoolExecutor(max_workers=len(ACS_FILES)) as executor:
+        acs = {key: executor.submit(read_acs, CENSUS_DIR / filename, codes)
+               for key, (filename, codes) in ACS_FILES.items()}
+    
     # Median Household Income
     try:
-        income = pd.read_csv(CENSUS_DIR / "median_household_income_2020.csv")
-        if 'GEO_ID' in income.columns:
-            income = income[income['GEO_ID'].str.startswith('0500000US12', na=False)]
-            income['FIPS'] = income['GEO_ID'].str[-5:].astype(int)
-            
+        income = acs['income'].result()
+        if income is not None:
             # Look for estimate column
-            income_col = [col for col in income.columns if 'B19013' in col and col.endswith('E')][0]
+            income_col = acs_estimates(income.columns)['B19013_001']
             income = income[['FIPS', income_col]].rename(columns={income_col: 'Median_Household_Income'})
             income['Median_Household_Income'] = pd.to_numeric(income['Median_Household_Income'], errors='coerce')
             census_dfs['income'] = income
@@ -57,11 +110,9 @@ def process_census_data():
     
     # Total Population
     try:
-        pop = pd.read_csv(CENSUS_DIR / "total_population_2020.csv")
-        if 'GEO_ID' in pop.columns:
-            pop = pop[pop['GEO_ID'].str.startswith('0500000US12', na=False)]
-            pop['FIPS'] = pop['GEO_ID'].str[-5:].astype(int)
-            pop_col = [col for col in pop.columns if 'B01003' in col and col.endswith('E')][0]
+        pop = acs['population'].result()
+        if pop is not None:
+            pop_col = acs_estimates(pop.columns)['B01003_001']
             pop = pop[['FIPS', pop_col]].rename(columns={pop_col: 'Total_Population'})
             pop['Total_Population'] = pd.to_numeric(pop['Total_Population'], errors='coerce')
             census_dfs['population'] = pop
@@ -71,32 +122,11 @@ def process_census_data():
     
     # Educational Attainment
     try:
-        edu = pd.read_csv(CENSUS_DIR / "educational_attainment_2020.csv")
-        if 'GEO_ID' in edu.columns:
-            edu = edu[edu['GEO_ID'].str.startswith('0500000US12', na=False)]
-            edu['FIPS'] = edu['GEO_ID'].str[-5:].astype(int)
-            
-            # Total population 25+
-            total_col = [col for col in edu.columns if 'B15003_001' in col and col.endswith('E')]
-            # Bachelor's degree
-            bach_col = [col for col in edu.columns if 'B15003_022' in col and col.endswith('E')]
-            # Master's degree
-            mast_col = [col for col in edu.columns if 'B15003_023' in col and col.endswith('E')]
-            # Professional degree
-            prof_col = [col for col in edu.columns if 'B15003_024' in col and col.endswith('E')]
-            # Doctorate
-            doct_col = [col for col in edu.columns if 'B15003_025' in col and col.endswith('E')]
-            
-            if total_col and bach_col:
-                edu['Total_25plus'] = pd.to_numeric(edu[total_col[0]], errors='coerce')
-                edu['Bachelors_Plus'] = (
-                    pd.to_numeric(edu[bach_col[0]], errors='coerce') +
-                    pd.to_numeric(edu[mast_col[0]] if mast_col else 0, errors='coerce') +
-                    pd.to_numeric(edu[prof_col[0]] if prof_col else 0, errors='coerce') +
-                    pd.to_numeric(edu[doct_col[0]] if doct_col else 0, errors='coerce')
-                )
-                edu['Pct_Bachelors_Plus'] = (edu['Bachelors_Plus'] / edu['Total_25plus'] * 100).round(2)
-                edu = edu[['FIPS', 'Pct_Bachelors_Plus']]
+        edu = acs['education'].result()
+        if edu is not None:
+            pct = pct_bachelors_plus(edu)
+            if pct is not None:
+                edu = edu[['FIPS']].assign(Pct_Bachelors_Plus=pct)
                 census_dfs['education'] = edu
                 print(f"\tProcessed: {len(edu)} counties")
     except Exception as e:
@@ -104,15 +134,12 @@ def process_census_data():
     
     # Median Age from Sex by Age
     try:
-        age = pd.read_csv(CENSUS_DIR / "sex_by_age_2020.csv")
-        if 'GEO_ID' in age.columns:
-            age = age[age['GEO_ID'].str.startswith('0500000US12', na=False)]
-            age['FIPS'] = age['GEO_ID'].str[-5:].astype(int)
-            
+        age = acs['age'].result()
+        if age is not None:
             # Find median age column
-            median_age_col = [col for col in age.columns if 'B01002_001' in col and col.endswith('E')]
+            median_age_col = acs_estimates(age.columns).get('B01002_001')
             if median_age_col:
-                age = age[['FIPS', median_age_col[0]]].rename(columns={median_age_col[0]: 'Median_Age'})
+                age = age[['FIPS', median_age_col]].rename(columns={median_age_col: 'Median_Age'})
                 age['Median_Age'] = pd.to_numeric(age['Median_Age'], errors='coerce')
                 census_dfs['age'] = age
                 print(f"\tProcessed: {len(age)} counties")
@@ -121,14 +148,9 @@ def process_census_data():
     
     # Combine all census data
     if census_dfs:
-        census_combined = census_dfs['income'] if 'income' in census_dfs else None
-        
-        for key in ['population', 'education', 'age']:
-            if key in census_dfs:
-                if census_combined is not None:
-                    census_combined = census_combined.merge(census_dfs[key], on='FIPS', how='outer')
-                else:
-                    census_combined = census_dfs[key]
+        census_combined = _combine_on_fips(
+            [census_dfs[key] for key in ['income', 'population', 'education', 'age'] if key in census_dfs]
+        )
         
         print(f"\tCombined Census data: {len(census_combined)} counties, {len(census_combined.columns)-1} variables")
         return census_combined
@@ -139,111 +161,25 @@ def process_census_data():
 def process_bea_data():
     bea_dfs = {}
     
-    # Personal Income (CAINC1)
-    try:
-        income_file = BEA_DIR / "personal_income" / "CAINC1_FL_1969_2023.csv"
-        income = pd.read_csv(income_file, encoding='latin1')
-        
-        # Clean GeoFIPS - remove quotes and spaces
-        income['GeoFIPS_clean'] = income['GeoFIPS'].str.strip().str.strip('"').str.strip()
-        
-        # Filter for Florida counties
-        income = income[income['GeoFIPS_clean'].str.len() == 5]
-        income = income[income['GeoFIPS_clean'].str.startswith('12')]
-        income = income[income['GeoFIPS_clean'] != '12000']  # Exclude state total
-        income['FIPS'] = income['GeoFIPS_clean'].astype(int)
-        
-        # Get most recent year available
-        year_cols = [col for col in income.columns if col.isdigit()]
-        latest_year = max(year_cols)
-        
-        # Filter for Per Capita Personal Income line
-        income['Description_clean'] = income['Description'].str.strip()
-        income = income[income['Description_clean'].str.contains('Per capita personal income', case=False, na=False)]
-        
-        income = income[['FIPS', latest_year]].rename(columns={latest_year: 'Per_Capita_Income'})
-        income['Per_Capita_Income'] = pd.to_numeric(income['Per_Capita_Income'], errors='coerce')
-        
-        bea_dfs['income'] = income
-        print(f"\tProcessed: {len(income)} counties ({latest_year} data)")
-    except Exception as e:
-        print(f"\tError: {e}")
-        import traceback
-        traceback.print_exc()
+    # Load all tables concurrently; errors surface from result() below
+    with ThreadPoolExecutor(max_workers=len(BEA_TABLES)) as executor:
+        loads = {key: executor.submit(_load_latest_bea, *spec) for key, spec in BEA_TABLES.items()}
     
-    # GDP (CAGDP2)
-    try:
-        gdp_file = BEA_DIR / "gdp" / "CAGDP2_FL_2001_2023.csv"
-        gdp = pd.read_csv(gdp_file, encoding='latin1')
-        
-        # Clean GeoFIPS
-        gdp['GeoFIPS_clean'] = gdp['GeoFIPS'].str.strip().str.strip('"').str.strip()
-        
-        # Filter for counties
-        gdp = gdp[gdp['GeoFIPS_clean'].str.len() == 5]
-        gdp = gdp[gdp['GeoFIPS_clean'].str.startswith('12')]
-        gdp = gdp[gdp['GeoFIPS_clean'] != '12000']
-        gdp['FIPS'] = gdp['GeoFIPS_clean'].astype(int)
-        
-        year_cols = [col for col in gdp.columns if col.isdigit()]
-        latest_year = max(year_cols)
-        
-        # Filter for total GDP
-        gdp['Description_clean'] = gdp['Description'].str.strip()
-        gdp = gdp[gdp['Description_clean'].str.contains('All industry total', case=False, na=False)]
-        
-        gdp = gdp[['FIPS', latest_year]].rename(columns={latest_year: 'GDP_Millions'})
-        gdp['GDP_Millions'] = pd.to_numeric(gdp['GDP_Millions'], errors='coerce')
-        
-        bea_dfs['gdp'] = gdp
-        print(f"\tProcessed: {len(gdp)} counties ({latest_year} data)")
-    except Exception as e:
-        print(f"\tError: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    # Employment (CAINC4)
-    try:
-        emp_file = BEA_DIR / "employment" / "CAINC4_FL_1969_2023.csv"
-        emp = pd.read_csv(emp_file, encoding='latin1')
-        
-        # Clean GeoFIPS
-        emp['GeoFIPS_clean'] = emp['GeoFIPS'].str.strip().str.strip('"').str.strip()
-        
-        # Filter for counties
-        emp = emp[emp['GeoFIPS_clean'].str.len() == 5]
-        emp = emp[emp['GeoFIPS_clean'].str.startswith('12')]
-        emp = emp[emp['GeoFIPS_clean'] != '12000']
-        emp['FIPS'] = emp['GeoFIPS_clean'].astype(int)
-        
-        year_cols = [col for col in emp.columns if col.isdigit()]
-        latest_year = max(year_cols)
-        
-        # Filter for total employment line
-        emp['Description_clean'] = emp['Description'].str.strip()
-        # CAINC4 has "Total employment" in the description
-        emp = emp[emp['Description_clean'].str.contains('Total employment', case=False, na=False)]
-        
-        emp = emp[['FIPS', latest_year]].rename(columns={latest_year: 'Total_Employment'})
-        emp['Total_Employment'] = pd.to_numeric(emp['Total_Employment'], errors='coerce')
-        
-        bea_dfs['employment'] = emp
-        print(f"\tProcessed: {len(emp)} counties ({latest_year} data)")
-    except Exception as e:
-        print(f"\tError: {e}")
-        import traceback
-        traceback.print_exc()
+    for key, load in loads.items():
+        try:
+            df, latest_year = load.result()
+            bea_dfs[key] = df
+            print(f"\tProcessed: {len(df)} counties ({latest_year} data)")
+        except Exception as e:
+            print(f"\tError: {e}")
+            import traceback
+            traceback.print_exc()
     
     # Combine BEA data
     if bea_dfs:
-        bea_combined = bea_dfs['income'] if 'income' in bea_dfs else None
-        
-        for key in ['gdp', 'employment']:
-            if key in bea_dfs:
-                if bea_combined is not None:
-                    bea_combined = bea_combined.merge(bea_dfs[key], on='FIPS', how='outer')
-                else:
-                    bea_combined = bea_dfs[key]
+        bea_combined = _combine_on_fips(
+            [bea_dfs[key] for key in ['income', 'gdp', 'employment'] if key in bea_dfs]
+        )
         
         print(f"\tCombined BEA data: {len(bea_combined)} counties, {len(bea_combined.columns)-1} variables")
         return bea_combined
@@ -253,8 +189,8 @@ def process_bea_data():
 
 # Integrate election, census, and BEA data
 def integrate_all_data(elections, census, bea):
-    # election data
-    integrated = elections.copy()
+    # election data (each merge below returns a new frame)
+    integrated = elections
     
     # Add Census data
     if census is not None:
@@ -272,7 +208,7 @@ def integrate_all_data(elections, census, bea):
     return integrated
 
 # Create summary statistics for integrated data
-def create_analysis_summary(df):
+def create_analysis_summary(df, df_2024):
     print("\n  Data Completeness:")
     total_records = len(df)
     for col in df.columns:
@@ -284,7 +220,6 @@ def create_analysis_summary(df):
     
     # Correlation between demographics and 2024 turnout
     print("\n  Correlation check (2024 election):")
-    df_2024 = df[df['Year'] == 2024].copy()
     
     numeric_cols = df_2024.select_dtypes(include=[np.number]).columns
     demo_vars = [col for col in numeric_cols if col not in ['Year', 'FIPS', 'Registered_Voters', 'Votes_Cast', 'Turnout_Percent']]
@@ -292,10 +227,11 @@ def create_analysis_summary(df):
     if len(demo_vars) > 0:
         try:
             # Calculate correlations only for columns with data
-            corr_data = df_2024[demo_vars + ['Turnout_Percent']].dropna(axis=1, how='all')
-            if 'Turnout_Percent' in corr_data.columns and len(corr_data.columns) > 1:
-                corr_matrix = corr_data.corr()
-                corr_with_turnout = corr_matrix['Turnout_Percent'].drop('Turnout_Percent')
+            corr_data = df_2024[demo_vars].dropna(axis=1, how='all')
+            turnout = df_2024['Turnout_Percent']
+            if turnout.notna().any() and len(corr_data.columns) > 0:
+                # Only the turnout row of the correlation matrix is needed
+                corr_with_turnout = corr_data.corrwith(turnout)
                 
                 print("\tCorrelation with Turnout:")
                 for var in corr_with_turnout.sort_values(ascending=False).index:
@@ -310,18 +246,18 @@ def create_analysis_summary(df):
         print("\tNo demographic variables available")
 
 # Save integrated dataset
-def save_integrated_data(df):
+def save_integrated_data(df, df_2024):
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
     output_file = OUTPUT_DIR / "Master_Dataset_Integrated.csv"
     df.to_csv(output_file, index=False)
+    df.to_parquet(output_file.with_suffix('.parquet'), compression='snappy', index=False)
     
     print(f"\tSaved: {output_file}")
     print(f"\tRows: {len(df)}")
     print(f"\tColumns: {len(df.columns)}")
     
     # Save a 2024-only file for sample analysis
-    df_2024 = df[df['Year'] == 2024]
     output_2024 = OUTPUT_DIR / "Analysis_Dataset_2024.csv"
     df_2024.to_csv(output_2024, index=False)
     print(f"\tSaved 2024 sample: {output_2024}")
@@ -342,18 +278,21 @@ def main():
         # Integrate all data
         integrated = integrate_all_data(elections, census, bea)
         
+        # 2024 subset shared by the summary and the sample file
+        integrated_2024 = integrated[integrated['Year'] == 2024]
+        
         # Create summary
-        create_analysis_summary(integrated)
+        create_analysis_summary(integrated, integrated_2024)
         
         # Save results
-        output_file = save_integrated_data(integrated)
+        output_file = save_integrated_data(integrated, integrated_2024)
         
     except Exception as e:
         print(f"\nError: {e}")
         import traceback
         traceback.print_exc()
     finally:
-        input("\nPress Enter to exit...")
+        pause()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+Shared helpers for the pipeline scripts
+"""
+
+import pandas as pd
+import os
+import sys
+
+def read_processed(csv_file, **read_csv_kwargs):
+    """Read a pipeline output, preferring its typed Parquet copy when that is at least as new as the CSV
+    
+    A CSV regenerated or edited after the Parquet copy was written is read instead
+    (read_csv_kwargs apply to that read only)
+    """
+    parquet_file = csv_file.with_suffix('.parquet')
+    if parquet_file.exists() and (not csv_file.exists()
+                                  or parquet_file.stat().st_mtime >= csv_file.stat().st_mtime):
+        return pd.read_parquet(parquet_file)
+    return pd.read_csv(csv_file, **read_csv_kwargs)
+
+def map_by_fips(df, table):
+    """Add every column of a per-county table (with a FIPS column) to df by FIPS lookup
+    
+    The table has one row per county, so a map replaces a merge; unmatched FIPS get NA
+    """
+    lookup = table.set_index('FIPS')
+    return df.assign(**{col: df['FIPS'].map(lookup[col]) for col in lookup.columns})
+
+def is_interactive():
+    """True when stdin is a terminal and BATCH=1 is not set; piped runs and batch jobs never prompt"""
+    return sys.stdin.isatty() and os.environ.get('BATCH') != '1'
+
+def pause(prompt="\nPress Enter to exit..."):
+    """Wait for Enter in an interactive terminal; otherwise return immediately"""
+    if is_interactive():
+        input(prompt)
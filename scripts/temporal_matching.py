@@ -7,6 +7,11 @@ Addresses instructor feedback about using year-specific data
 import pandas as pd
 from pathlib import Path
 import numpy as np
+import re
+from acs_utils import BACHELORS_PLUS_CODES, acs_estimates, pct_bachelors_plus, read_acs
+from bea_utils import load_bea
+from pipeline_utils import map_by_fips, pause, read_processed
+from usda_utils import load_rucc
 
 # Configuration
 current_dir = Path.cwd()
@@ -31,7 +36,8 @@ def load_election_data():
     print("=" * 70)
     print("\n[1/5] Loading election data...")
     
-    elections = pd.read_csv(ELECTION_FILE)
+    # Prefer an up-to-date typed Parquet copy written by clean_standardize.py
+    elections = read_processed(ELECTION_FILE).astype({'FIPS': 'Int32', 'Year': 'int16'})
     print(f"Loaded election data: {len(elections)} rows")
     print(f"  Years: {sorted(elections['Year'].unique())}")
     
@@ -50,82 +56,50 @@ def process_bea_temporal(elections):
         2024: '2023'
     }
     
-    all_bea_data = []
+    # Load each BEA file once with just the mapped year columns
+    try:
+        income_all = load_bea(BEA_DIR / "personal_income" / "CAINC1_FL_1969_2023.csv",
+                              re.compile('Per capita personal income', re.IGNORECASE), year_mapping.values())
+    except Exception as e:
+        print(f"    Income error: {e}")
+        income_all = None
+    
+    try:
+        gdp_all = load_bea(BEA_DIR / "gdp" / "CAGDP2_FL_2001_2023.csv",
+                           re.compile('All industry total', re.IGNORECASE), year_mapping.values())
+    except Exception as e:
+        print(f"    GDP error: {e}")
+        gdp_all = None
     
     for election_year, bea_year in year_mapping.items():
         print(f"\n  Processing {election_year} election → {bea_year} BEA data:")
         
-        # Get elections for this year
-        year_elections = elections[elections['Year'] == election_year].copy()
-        
-        # Process Personal Income
-        try:
-            income_file = BEA_DIR / "personal_income" / "CAINC1_FL_1969_2023.csv"
-            income = pd.read_csv(income_file, encoding='latin1')
-            
-            # Clean and filter
-            income['GeoFIPS_clean'] = income['GeoFIPS'].str.strip().str.strip('"').str.strip()
-            income = income[income['GeoFIPS_clean'].str.len() == 5]
-            income = income[income['GeoFIPS_clean'].str.startswith('12')]
-            income = income[income['GeoFIPS_clean'] != '12000']
-            income['FIPS'] = income['GeoFIPS_clean'].astype(int)
-            
-            # Filter for Per Capita Income line
-            income['Description_clean'] = income['Description'].str.strip()
-            income = income[income['Description_clean'].str.contains('Per capita personal income', case=False, na=False)]
-            
-            # Extract year-specific data
-            if bea_year in income.columns:
-                income = income[['FIPS', bea_year]].rename(columns={bea_year: 'Per_Capita_Income'})
-                income['Per_Capita_Income'] = pd.to_numeric(income['Per_Capita_Income'], errors='coerce')
-                print(f"    Per Capita Income: {len(income)} counties")
+        if income_all is not None:
+            if bea_year in income_all.columns:
+                print(f"    Per Capita Income: {len(income_all)} counties")
             else:
                 print(f"    Year {bea_year} not found in income file")
-                income = None
-        except Exception as e:
-            print(f"    Income error: {e}")
-            income = None
         
-        # Process GDP
-        try:
-            gdp_file = BEA_DIR / "gdp" / "CAGDP2_FL_2001_2023.csv"
-            gdp = pd.read_csv(gdp_file, encoding='latin1')
-            
-            # Clean and filter
-            gdp['GeoFIPS_clean'] = gdp['GeoFIPS'].str.strip().str.strip('"').str.strip()
-            gdp = gdp[gdp['GeoFIPS_clean'].str.len() == 5]
-            gdp = gdp[gdp['GeoFIPS_clean'].str.startswith('12')]
-            gdp = gdp[gdp['GeoFIPS_clean'] != '12000']
-            gdp['FIPS'] = gdp['GeoFIPS_clean'].astype(int)
-            
-            # Filter for All Industry Total
-            gdp['Description_clean'] = gdp['Description'].str.strip()
-            gdp = gdp[gdp['Description_clean'].str.contains('All industry total', case=False, na=False)]
-            
-            # Extract year-specific data
-            if bea_year in gdp.columns:
-                gdp = gdp[['FIPS', bea_year]].rename(columns={bea_year: 'GDP_Millions'})
-                gdp['GDP_Millions'] = pd.to_numeric(gdp['GDP_Millions'], errors='coerce')
-                print(f"    GDP: {len(gdp)} counties")
+        if gdp_all is not None:
+            if bea_year in gdp_all.columns:
+                print(f"    GDP: {len(gdp_all)} counties")
             else:
                 print(f"    Year {bea_year} not found in GDP file")
-                gdp = None
-        except Exception as e:
-            print(f"    GDP error: {e}")
-            gdp = None
-        
-        # Merge BEA data with elections for this year
-        year_data = year_elections.copy()
-        if income is not None:
-            year_data = year_data.merge(income, on='FIPS', how='left')
-        if gdp is not None:
-            year_data = year_data.merge(gdp, on='FIPS', how='left')
         
-        all_bea_data.append(year_data)
         print(f"    Integrated {election_year} data")
     
-    # Combine all years
-    combined = pd.concat(all_bea_data, ignore_index=True)
+    # Tag each election with its BEA year (grouped by election year, as before)
+    combined = elections[elections['Year'].isin(year_mapping)].sort_values('Year', kind='stable')
+    combined['BEA_Year'] = combined['Year'].map(year_mapping)
+    
+    # Reshape each BEA table to long form (FIPS, BEA_Year) and join it once
+    for bea_all, value_col in ((income_all, 'Per_Capita_Income'), (gdp_all, 'GDP_Millions')):
+        if bea_all is None:
+            continue
+        bea_long = bea_all.rename_axis(columns='BEA_Year').stack().rename(value_col).reset_index()
+        combined = combined.merge(bea_long, on=['FIPS', 'BEA_Year'], how='left')
+    
+    combined = combined.drop(columns='BEA_Year').reset_index(drop=True)
     print(f"\n  Combined all years: {len(combined)} observations")
     
     return combined
@@ -138,11 +112,9 @@ def add_census_data(df):
     
     # Median Household Income
     try:
-        income = pd.read_csv(CENSUS_DIR / "median_household_income_2020.csv")
-        if 'GEO_ID' in income.columns:
-            income = income[income['GEO_ID'].str.startswith('0500000US12', na=False)]
-            income['FIPS'] = income['GEO_ID'].str[-5:].astype(int)
-            income_col = [col for col in income.columns if 'B19013' in col and col.endswith('E')][0]
+        income = read_acs(CENSUS_DIR / "median_household_income_2020.csv", ['B19013'])
+        if income is not None:
+            income_col = acs_estimates(income.columns)['B19013_001']
             income = income[['FIPS', income_col]].rename(columns={income_col: 'Median_Household_Income'})
             income['Median_Household_Income'] = pd.to_numeric(income['Median_Household_Income'], errors='coerce')
             census_vars['income'] = income
@@ -152,11 +124,9 @@ def add_census_data(df):
     
     # Total Population
     try:
-        pop = pd.read_csv(CENSUS_DIR / "total_population_2020.csv")
-        if 'GEO_ID' in pop.columns:
-            pop = pop[pop['GEO_ID'].str.startswith('0500000US12', na=False)]
-            pop['FIPS'] = pop['GEO_ID'].str[-5:].astype(int)
-            pop_col = [col for col in pop.columns if 'B01003' in col and col.endswith('E')][0]
+        pop = read_acs(CENSUS_DIR / "total_population_2020.csv", ['B01003'])
+        if pop is not None:
+            pop_col = acs_estimates(pop.columns)['B01003_001']
             pop = pop[['FIPS', pop_col]].rename(columns={pop_col: 'Total_Population'})
             pop['Total_Population'] = pd.to_numeric(pop['Total_Population'], errors='coerce')
             census_vars['population'] = pop
@@ -166,35 +136,19 @@ def add_census_data(df):
     
     # Educational Attainment
     try:
-        edu = pd.read_csv(CENSUS_DIR / "educational_attainment_2020.csv")
-        if 'GEO_ID' in edu.columns:
-            edu = edu[edu['GEO_ID'].str.startswith('0500000US12', na=False)]
-            edu['FIPS'] = edu['GEO_ID'].str[-5:].astype(int)
-            
-            total_col = [col for col in edu.columns if 'B15003_001' in col and col.endswith('E')]
-            bach_col = [col for col in edu.columns if 'B15003_022' in col and col.endswith('E')]
-            mast_col = [col for col in edu.columns if 'B15003_023' in col and col.endswith('E')]
-            prof_col = [col for col in edu.columns if 'B15003_024' in col and col.endswith('E')]
-            doct_col = [col for col in edu.columns if 'B15003_025' in col and col.endswith('E')]
-            
-            if total_col and bach_col:
-                edu['Total_25plus'] = pd.to_numeric(edu[total_col[0]], errors='coerce')
-                edu['Bachelors_Plus'] = (
-                    pd.to_numeric(edu[bach_col[0]], errors='coerce') +
-                    pd.to_numeric(edu[mast_col[0]] if mast_col else 0, errors='coerce') +
-                    pd.to_numeric(edu[prof_col[0]] if prof_col else 0, errors='coerce') +
-                    pd.to_numeric(edu[doct_col[0]] if doct_col else 0, errors='coerce')
-                )
-                edu['Pct_Bachelors_Plus'] = (edu['Bachelors_Plus'] / edu['Total_25plus'] * 100).round(2)
-                edu = edu[['FIPS', 'Pct_Bachelors_Plus']]
+        edu = read_acs(CENSUS_DIR / "educational_attainment_2020.csv", BACHELORS_PLUS_CODES)
+        if edu is not None:
+            pct = pct_bachelors_plus(edu)
+            if pct is not None:
+                edu = edu[['FIPS']].assign(Pct_Bachelors_Plus=pct)
                 census_vars['education'] = edu
                 print(f"  Education: {len(edu)} counties")
     except Exception as e:
         print(f"  Education error: {e}")
     
-    # Merge all Census variables
+    # Add each Census variable by FIPS lookup
     for key, data in census_vars.items():
-        df = df.merge(data, on='FIPS', how='left')
+        df = map_by_fips(df, data)
     
     return df
 
@@ -203,36 +157,11 @@ def add_usda_codes(df):
     print("\n[4/5] Adding USDA Rural-Urban codes...")
     
     try:
-        usda = pd.read_csv(USDA_FILE, encoding='latin1')
-        usda['State_FIPS'] = usda['FIPS'].astype(str).str[:2]
-        florida_usda = usda[usda['State_FIPS'] == '12'].copy()
-        
-        # Filter for RUCC attribute
-        florida_rucc = florida_usda[florida_usda['Attribute'] == 'RUCC_2023'].copy()
-        florida_rucc = florida_rucc[['FIPS', 'Value']].copy()
-        florida_rucc.columns = ['FIPS', 'Rural_Urban_Code']
-        florida_rucc['Rural_Urban_Code'] = pd.to_numeric(florida_rucc['Rural_Urban_Code'], errors='coerce')
-        
-        # Add descriptions and categories
-        rucc_descriptions = {
-            1: 'Metro - Large (1M+ pop)', 2: 'Metro - Medium (250K-1M pop)', 
-            3: 'Metro - Small (<250K pop)', 4: 'Nonmetro - Urban (20K+, adjacent to metro)',
-            5: 'Nonmetro - Urban (20K+, not adjacent)', 6: 'Nonmetro - Urban (2.5-20K, adjacent to metro)',
-            7: 'Nonmetro - Urban (2.5-20K, not adjacent)', 8: 'Nonmetro - Rural (<2.5K, adjacent to metro)',
-            9: 'Nonmetro - Rural (<2.5K, not adjacent)'
-        }
-        florida_rucc['Rural_Urban_Description'] = florida_rucc['Rural_Urban_Code'].map(rucc_descriptions)
-        
-        def categorize(code):
-            if pd.isna(code): return None
-            if code in [1, 2, 3]: return 'Metropolitan'
-            elif code in [4, 5, 6, 7]: return 'Micropolitan/Small Urban'
-            else: return 'Rural'
-        
-        florida_rucc['Urban_Rural_Category'] = florida_rucc['Rural_Urban_Code'].apply(categorize)
+        # Florida RUCC codes with descriptions and categories (shared with add_usda_codes.py)
+        florida_rucc = load_rucc(USDA_FILE)
         
-        # Merge
-        df = df.merge(florida_rucc, on='FIPS', how='left')
+        # Look up the USDA columns by FIPS
+        df = map_by_fips(df, florida_rucc)
         print(f"  Added USDA codes: {len(florida_rucc)} counties matched")
         
     except Exception as e:
@@ -249,6 +178,7 @@ def save_and_summarize(df):
     # Save complete dataset
     output_file = OUTPUT_DIR / "Master_Dataset_Temporal_Matched.csv"
     df.to_csv(output_file, index=False)
+    df.to_parquet(output_file.with_suffix('.parquet'), compression='snappy', index=False)
     
     print(f"  Saved: {output_file}")
     print(f"    Rows: {len(df)}")
@@ -256,12 +186,13 @@ def save_and_summarize(df):
     
     # Data completeness check
     print("\n  Data Completeness by Variable:")
-    for col in df.columns:
-        if col not in ['County', 'Election_Date', 'County_Original', 'USDA_County_Name']:
-            missing = df[col].isnull().sum()
-            pct = ((len(df) - missing) / len(df) * 100)
-            status = "✓" if pct == 100 else "⚠"
-            print(f"    {status} {col}: {pct:.1f}%")
+    # Non-null share of every column in one pass
+    completeness = df.notna().mean().mul(100).drop(
+        ['County', 'Election_Date', 'County_Original', 'USDA_County_Name'], errors='ignore'
+    )
+    print("\n".join(
+        f"    {'✓' if pct == 100 else '⚠'} {col}: {pct:.1f}%" for col, pct in completeness.items()
+    ))
     
     # Show temporal variation
     print("\n  BEA Data Temporal Variation (Per Capita Income):")
@@ -299,7 +230,7 @@ def main():
         import traceback
         traceback.print_exc()
     finally:
-        input("\nPress Enter to exit...")
+        pause()
 
 if __name__ == "__main__":
     main()
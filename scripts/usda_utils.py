@@ -0,0 +1,86 @@
+"""
+Shared USDA Rural-Urban Continuum Code helpers
+Used by add_usda_codes.py (Step 4) and temporal_matching.py (Step 5)
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+from functools import lru_cache
+
+# RUCC code descriptions
+RUCC_DESCRIPTIONS = {
+    1: 'Metro - Large (1M+ pop)',
+    2: 'Metro - Medium (250K-1M pop)',
+    3: 'Metro - Small (<250K pop)',
+    4: 'Nonmetro - Urban (20K+, adjacent to metro)',
+    5: 'Nonmetro - Urban (20K+, not adjacent)',
+    6: 'Nonmetro - Urban (2.5-20K, adjacent to metro)',
+    7: 'Nonmetro - Urban (2.5-20K, not adjacent)',
+    8: 'Nonmetro - Rural (<2.5K, adjacent to metro)',
+    9: 'Nonmetro - Rural (<2.5K, not adjacent)'
+}
+
+# Simplified categories
+RUCC_CATEGORIES = {
+    1: 'Metropolitan',
+    2: 'Metropolitan',
+    3: 'Metropolitan',
+    4: 'Micropolitan/Small Urban',
+    5: 'Micropolitan/Small Urban',
+    6: 'Micropolitan/Small Urban',
+    7: 'Micropolitan/Small Urban',
+    8: 'Rural',
+    9: 'Rural'
+}
+
+def read_usda(path, usecols=None, state_fips='12', encoding='latin1'):
+    """Read one state's rows from the USDA file; the state filter runs during the CSV scan
+    
+    usecols is a list of column names or a callable applied to each header name (as in pd.read_csv)
+    """
+    csv_format = ds.CsvFileFormat(read_options=pa_csv.ReadOptions(encoding=encoding))
+    usda = ds.dataset(path, format=csv_format)
+    if callable(usecols):
+        usecols = [col for col in usda.schema.names if usecols(col)]
+    in_state = pc.starts_with(ds.field('FIPS').cast(pa.string()), state_fips)
+    return usda.to_table(columns=usecols, filter=in_state).to_pandas()
+
+def add_rucc_labels(rucc):
+    """Add Rural_Urban_Description and Urban_Rural_Category from Rural_Urban_Code"""
+    rucc['Rural_Urban_Description'] = rucc['Rural_Urban_Code'].map(RUCC_DESCRIPTIONS)
+    rucc['Urban_Rural_Category'] = rucc['Rural_Urban_Code'].map(RUCC_CATEGORIES)
+    return rucc
+
+def rucc_attribute(usda):
+    """Name of the first RUCC attribute in a long-format USDA frame (None if there is none)"""
+    return next((attr for attr in usda['Attribute'].unique() if 'RUCC' in str(attr)), None)
+
+def rucc_codes(usda, attribute):
+    """Rows of a long-format USDA frame for one RUCC attribute, with Value as a numeric Rural_Urban_Code
+    
+    Other columns (FIPS, County_Name, ...) are kept; FIPS becomes int32
+    """
+    rucc = usda.loc[usda['Attribute'] == attribute].drop(columns='Attribute').rename(
+        columns={'Value': 'Rural_Urban_Code'}
+    )
+    # Codes 1-9 fit in int8 (stays float if any code is missing)
+    rucc['Rural_Urban_Code'] = pd.to_numeric(rucc['Rural_Urban_Code'], errors='coerce', downcast='integer')
+    rucc['FIPS'] = rucc['FIPS'].astype('int32')
+    return rucc
+
+@lru_cache(maxsize=4)
+def load_rucc(path, state_fips='12', encoding='latin1'):
+    """Load a state's RUCC codes with descriptions and categories from the long-format USDA file
+    
+    Results are cached per (path, state_fips, encoding); the returned frame is shared, so do not modify it
+    """
+    usda = read_usda(path, usecols=['FIPS', 'Attribute', 'Value'], state_fips=state_fips, encoding=encoding)
+    
+    attribute = rucc_attribute(usda)
+    if attribute is None:
+        raise ValueError(f"No RUCC attribute in {path}")
+    
+    return add_rucc_labels(rucc_codes(usda, attribute)).reset_index(drop=True)